@@ -0,0 +1,263 @@
+import argparse
+import base64
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from config import DB_NAME
+from storage import change_state
+from timeseries import bucket_mean, from_points, lttb, to_points
+
+# --- Configuration ---
+HOST = '127.0.0.1'
+PORT = 8000
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_POINTS = 5000
+DOWNSAMPLERS = {'lttb': lttb, 'mean': bucket_mean}
+CACHE_SIZE = 256  # Cached responses (LRU)
+
+
+class BadRequest(Exception):
+    pass
+
+
+# --- Helpers ---
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """Decodes a cursor made by encode_cursor and checks it holds one value of each of `types`."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise BadRequest("Invalid cursor")
+    if (not isinstance(values, list) or len(values) != len(types)
+            or not all(isinstance(v, t) and not isinstance(v, bool) for v, t in zip(values, types))):
+        raise BadRequest("Invalid cursor")
+    return values
+
+
+def int_param(params, name, default, minimum, maximum):
+    try:
+        value = int(params.get(name, [default])[0])
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer")
+    return max(minimum, min(value, maximum))
+
+
+class LRUCache:
+    """Thread-safe LRU mapping of request key -> response body."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# --- Queries ---
+
+def query_latest(conn, params):
+    """Latest observed price per product, ordered by URL."""
+    limit = int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    after = decode_cursor(params['cursor'][0], str)[0] if 'cursor' in params else ''
+    rows = conn.execute('''SELECT c.url, c.name, g.label, p.price, p.date
+                           FROM product_catalog c
+                           JOIN products p ON p.id = (SELECT id FROM products WHERE url = c.url
+                                                      ORDER BY date DESC, id DESC LIMIT 1)
+                           LEFT JOIN product_groups g ON g.id = c.group_id
+                           WHERE c.url > ?
+                           ORDER BY c.url
+                           LIMIT ?''', (after, limit + 1)).fetchall()
+    items = [{'url': u, 'name': n, 'model': m, 'price': p, 'date': d} for u, n, m, p, d in rows[:limit]]
+    next_cursor = encode_cursor([rows[limit - 1][0]]) if len(rows) > limit else None
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def query_history(conn, params):
+    """
+    Observations of one product, optionally within [start, end]. With `points`, the
+    range is downsampled server-side to at most that many points (no pagination),
+    using LTTB by default or bucket means with `method=mean`.
+    """
+    if 'url' not in params:
+        raise BadRequest("'url' is required")
+    url = params['url'][0]
+    start = params.get('start', ['0000'])[0]
+    end = params.get('end', ['9999'])[0]
+    if len(end) == 10:
+        end += ' 23:59:59'  # Inclusive whole-day end date
+
+    if 'points' in params:
+        points = int_param(params, 'points', MAX_POINTS, 3, MAX_POINTS)
+        method = params.get('method', ['lttb'])[0]
+        if method not in DOWNSAMPLERS:
+            raise BadRequest(f"'method' must be one of {sorted(DOWNSAMPLERS)}")
+        rows = conn.execute('''SELECT date, price FROM products
+                               WHERE url = ? AND date >= ? AND date <= ?
+                               ORDER BY date''', (url, start, end)).fetchall()
+        sampled = from_points(DOWNSAMPLERS[method](to_points(rows), points))
+        return {'url': url, 'total': len(rows),
+                'items': [{'date': d, 'price': round(p, 2)} for d, p in sampled], 'next_cursor': None}
+
+    limit = int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    after_date, after_id = decode_cursor(params['cursor'][0], str, int) if 'cursor' in params else (start, 0)
+    rows = conn.execute('''SELECT id, date, price FROM products
+                           WHERE url = ? AND (date, id) > (?, ?) AND date >= ? AND date <= ?
+                           ORDER BY date, id
+                           LIMIT ?''', (url, after_date, after_id, start, end, limit + 1)).fetchall()
+    items = [{'date': d, 'price': p} for _, d, p in rows[:limit]]
+    next_cursor = encode_cursor([rows[limit - 1][1], rows[limit - 1][0]]) if len(rows) > limit else None
+    return {'url': url, 'items': items, 'next_cursor': next_cursor}
+
+
+def query_deals(conn, params):
+    """Current deals (latest alert per product still matching its last price), biggest drop first."""
+    limit = int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    after_pct, after_id = (decode_cursor(params['cursor'][0], (int, float), int) if 'cursor' in params
+                           else (1e18, 0))
+    rows = conn.execute('''SELECT a.id, a.url, a.product_name, a.price, a.ew_mean, a.drop_pct,
+                                  a.is_all_time_low, a.date
+                           FROM deal_alerts a
+                           JOIN product_stats s ON s.url = a.url AND s.last_price = a.price
+                           WHERE a.id = (SELECT MAX(id) FROM deal_alerts WHERE url = a.url)
+                             AND (a.drop_pct < ? OR (a.drop_pct = ? AND a.id > ?))
+                           ORDER BY a.drop_pct DESC, a.id
+                           LIMIT ?''', (after_pct, after_pct, after_id, limit + 1)).fetchall()
+    items = [{'url': u, 'name': n, 'price': p, 'avg_price': round(m, 2), 'drop_pct': round(pct, 2),
+              'all_time_low': bool(low), 'date': d} for _, u, n, p, m, pct, low, d in rows[:limit]]
+    next_cursor = encode_cursor([rows[limit - 1][5], rows[limit - 1][0]]) if len(rows) > limit else None
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+ROUTES = {
+    '/latest': query_latest,
+    '/history': query_history,
+    '/deals': query_deals,
+}
+
+
+# --- Server ---
+
+class PriceAPIHandler(BaseHTTPRequestHandler):
+    server_version = 'KSPPriceAPI/1.0'
+
+    def _query(self, handler, params):
+        # Request threads are short-lived, so read-only connections are pooled on the server
+        try:
+            conn = self.server.pool.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(f"file:{self.server.db_name}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            return handler(conn, params)
+        finally:
+            self.server.pool.put(conn)
+
+    def _send(self, status, body=b'', etag=None, cache_status=None):
+        self.send_response(status)
+        if cache_status:
+            self.send_header('X-Cache', cache_status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if body:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        handler = ROUTES.get(parts.path)
+        if handler is None:
+            self._send(404, json.dumps({'error': 'Not found', 'endpoints': sorted(ROUTES)}).encode())
+            return
+
+        # The ETag only depends on the DB's change state and the request, so a client
+        # revalidating an unchanged resource is answered without touching the DB or cache
+        state = change_state(self.server.db_name)
+        etag = '"' + hashlib.sha1(f"{state}|{parts.path}?{parts.query}".encode()).hexdigest()[:20] + '"'
+        if etag in [t.strip() for t in self.headers.get('If-None-Match', '').split(',')]:
+            self._send(304, etag=etag)
+            return
+
+        key = (state, parts.path, parts.query)
+        body = self.server.cache.get(key)
+        cache_status = 'HIT'
+        if body is None:
+            cache_status = 'MISS'
+            try:
+                payload = self._query(handler, parse_qs(parts.query))
+            except BadRequest as e:
+                self._send(400, json.dumps({'error': str(e)}).encode())
+                return
+            except sqlite3.OperationalError as e:
+                error = f"Database not ready: {e}."
+                if 'no such table: product_catalog' in str(e):
+                    error += " Run `python ksp.py backfill --index-only` to build the catalog."
+                self._send(503, json.dumps({'error': error}).encode())
+                return
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.server.cache.put(key, body)
+        self._send(200, body, etag=etag, cache_status=cache_status)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class PriceAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 stalls concurrent clients on connect
+
+
+def make_server(db_name=DB_NAME, host=HOST, port=PORT, quiet=False):
+    server = PriceAPIServer((host, port), PriceAPIHandler)
+    server.db_name = db_name
+    server.cache = LRUCache()
+    server.pool = queue.SimpleQueue()
+    server.quiet = quiet
+    return server
+
+
+def serve(db_name=DB_NAME, host=HOST, port=PORT, quiet=False):
+    server = make_server(db_name, host, port, quiet)
+    print(f"🌐 Serving {db_name} on http://{host}:{port} (endpoints: {', '.join(sorted(ROUTES))})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 API stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only HTTP API over the price database.")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--quiet', action='store_true', help="Don't log every request")
+    args = parser.parse_args()
+    serve(args.db, args.host, args.port, args.quiet)
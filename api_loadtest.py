@@ -0,0 +1,81 @@
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from run_metrics import percentile
+
+# --- Configuration ---
+BASE_URL = 'http://127.0.0.1:8000'
+
+
+def default_paths(base_url):
+    """A mix of list, history and deals requests, using a real product URL from /latest."""
+    paths = ['/latest', '/latest?limit=200', '/deals']
+    with urlopen(base_url + '/latest?limit=5') as resp:
+        items = json.loads(resp.read())['items']
+    for item in items:
+        url = quote(item['url'], safe='')
+        paths += [f'/history?url={url}', f'/history?url={url}&points=100']
+    return paths
+
+
+def worker(base_url, paths, n_requests, revalidate, latencies, statuses, lock):
+    etags = {}
+    local_latencies, local_statuses = [], Counter()
+    for i in range(n_requests):
+        path = paths[i % len(paths)]
+        headers = {'If-None-Match': etags[path]} if revalidate and path in etags else {}
+        start = time.perf_counter()
+        try:
+            with urlopen(Request(base_url + path, headers=headers)) as resp:
+                resp.read()
+                status = resp.status
+                etags[path] = resp.headers.get('ETag')
+        except HTTPError as e:
+            status = e.code  # urllib reports 304 Not Modified as an error
+        local_latencies.append(time.perf_counter() - start)
+        local_statuses[status] += 1
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for api.py: requests/sec and latency percentiles.")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help="Total requests across all workers")
+    parser.add_argument('--revalidate', action='store_true',
+                        help="Send If-None-Match with the last ETag (exercises 304 responses)")
+    parser.add_argument('paths', nargs='*', help="Paths to request (default: a mix of all endpoints)")
+    args = parser.parse_args()
+
+    paths = args.paths or default_paths(args.base_url)
+    per_worker = max(1, args.requests // args.concurrency)
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    threads = [threading.Thread(target=worker, args=(args.base_url, paths, per_worker, args.revalidate,
+                                                     latencies, statuses, lock))
+               for _ in range(args.concurrency)]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"Requests:    {len(latencies):,} over {len(paths)} paths, {args.concurrency} workers")
+    print(f"Throughput:  {len(latencies) / elapsed:,.0f} req/sec ({elapsed:.2f}s)")
+    print(f"Latency:     p50 {percentile(latencies, 0.5) * 1000:.2f} ms | "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms | "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms | max {max(latencies) * 1000:.2f} ms")
+    print(f"Statuses:    {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from run_metrics import percentile
+
+
+def synthetic_observations(n_products, n_observations):
+    """Random-walk prices with occasional sharp drops, interleaved across products like a real crawl."""
+    prices = {f"https://ksp.co.il/web/item/{100000 + i}": random.uniform(200, 8000) for i in range(n_products)}
+    urls = list(prices)
+    start = datetime.now() - timedelta(days=365)
+    for i in range(n_observations):
+        url = urls[i % n_products]
+        price = prices[url] * random.uniform(0.98, 1.02)
+        if random.random() < 0.01:
+            price *= random.uniform(0.7, 0.9)  # Flash sale
+        prices[url] = price
+        yield url, f"Product {url[-6:]}", round(price), (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def recorded_observations(db_path):
+    """Replays real history from a scraper database (ksp_prices.db or market_pulse.db) in date order."""
+    conn = sqlite3.connect(db_path)
+    table, name_col = ('products', 'name') if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products'").fetchone() else ('prices', 'product_name')
+    rows = conn.execute(f"SELECT url, {name_col}, price, date FROM {table} ORDER BY date").fetchall()
+    conn.close()
+    return rows
+
+
+def replay(observations, batch_size, db_path):
+    """
+    Feeds observations through the real ingest path (storage.save_products: products
+    insert, variant matcher, deal detector) into a fresh file DB, one commit per batch.
+    """
+    os.environ['KSP_DB'] = db_path  # storage reads the DB name from config at import
+    from storage import init_db, save_products
+    init_db()
+    batch_latencies = []
+    alerts = 0
+
+    start = time.perf_counter()
+    for i in range(0, len(observations), batch_size):
+        batch_start = time.perf_counter()
+        alerts += len(save_products([(name, price, url, date)
+                                     for url, name, price, date in observations[i:i + batch_size]]))
+        batch_latencies.append(time.perf_counter() - batch_start)
+    elapsed = time.perf_counter() - start
+    return len(observations), alerts, elapsed, batch_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay benchmark for the ingest path (products, matcher, deal detector) on a file DB.")
+    parser.add_argument('--db', help="Replay recorded history from this DB instead of synthetic data")
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--observations', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=1000,
+                        help="Observations per save_products call (1 = one commit per row)")
+    args = parser.parse_args()
+
+    if args.db:
+        observations = recorded_observations(args.db)
+        source = args.db
+    else:
+        random.seed(42)
+        observations = list(synthetic_observations(args.products, args.observations))
+        source = f"synthetic ({args.products} products)"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        count, alerts, elapsed, batches = replay(observations, args.batch, os.path.join(tmp, 'bench.db'))
+    print(f"Source:       {source}")
+    print(f"Observations: {count:,}  |  Alerts: {alerts:,}")
+    print(f"Throughput:   {count / elapsed:,.0f} obs/sec ({elapsed:.2f}s total)")
+    if batches:
+        print(f"Batch of {args.batch}: p50 {percentile(batches, 0.5) * 1000:.1f} ms | "
+              f"p95 {percentile(batches, 0.95) * 1000:.1f} ms | max {max(batches) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+
+# --- Configuration shared by every entry point ---
+# All scrapers, reports, the dashboard and the API read and write this one database.
+# Override with the KSP_DB environment variable (or `ksp --db ...`).
+DB_NAME = os.environ.get('KSP_DB', 'ksp_prices.db')
+
+CATEGORY_URL = "https://ksp.co.il/web/cat/31635..61633..573"  # Smartphones
+# Another category, for example: "https://ksp.co.il/web/cat/1033..389"
+
+# Databases the scripts wrote before DB_NAME was shared (see `ksp backfill --import-legacy`):
+# path -> URL for rows stored without one (prices.db only ever tracked poc.py's item)
+LEGACY_DBS = {'market_pulse.db': None, 'prices.db': "https://ksp.co.il/web/item/253966"}
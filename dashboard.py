@@ -3,7 +3,13 @@ import sqlite3
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import re
+from config import DB_NAME
+from profiling import profiled
+from deal_detector import latest_deals
+from product_matcher import display_name, lookup_groups
+from product_search import search_products
+from storage import change_state
+from timeseries import from_points, lttb, to_points
 
 # --- Application Configuration ---
 st.set_page_config(page_title="KSP Deal Hunter", page_icon="🎯", layout="wide")
@@ -18,23 +24,11 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Configuration ---
-DB_NAME = 'ksp_prices.db'
+MAX_CHART_POINTS = 500  # History charts are downsampled to this many points
 
 
 # --- Helper Functions ---
 
-def clean_product_name(name):
-    if not isinstance(name, str): return str(name)
-    removals = ['טלפון סלולרי', 'יבואן רשמי', 'שנה אחריות', 'ללא מטען', 'וללא אוזניות', 'צבע', 'במבצע', 'מתנה', 'מהיר',
-                'חדש', 'הדגם החדש', 'GB', 'RAM']
-    for w in removals:
-        name = name.replace(w, '')
-    name = re.sub(r'(Black|White|Silver|Gold|Blue|Titanium|Natural|Green|Pink|Yellow|Purple|Gray)', '', name,
-                  flags=re.IGNORECASE)
-    name = re.sub(r'(שחור|לבן|כסף|זהב|כחול|טיטניום|טבעי|ירוק|ורוד|צהוב|סגול|אפור)', '', name)
-    return name.replace('-', '').replace('  ', ' ').strip()
-
-
 def identify_brand(name):
     name = str(name).lower()
     if 'apple' in name or 'iphone' in name: return 'Apple'
@@ -47,7 +41,9 @@ def identify_brand(name):
 
 # --- Data Management ---
 
-def load_and_process_data():
+@profiled('dashboard_load')
+def load_and_process_data(urls=None):
+    """Loads the full history, or only the history of the given product URLs (search results)."""
     try:
         conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
@@ -56,7 +52,13 @@ def load_and_process_data():
             conn.close()
             return None
 
-        df = pd.read_sql_query("SELECT * FROM products", conn)
+        if urls is None:
+            df = pd.read_sql_query("SELECT * FROM products", conn)
+        else:
+            placeholders = ','.join('?' * len(urls))
+            df = pd.read_sql_query(f"SELECT * FROM products WHERE url IN ({placeholders})", conn,
+                                   params=list(urls))
+        groups = lookup_groups(conn)
         conn.close()
 
         if df.empty: return pd.DataFrame()
@@ -70,7 +72,12 @@ def load_and_process_data():
 
         # Feature Engineering
         df['Brand'] = df['product_name'].apply(identify_brand)
-        df['ModelName'] = df['product_name'].apply(clean_product_name)
+        # Variant groups are assigned by the scraper (product_matcher); products it hasn't
+        # grouped yet fall back to their own model name so colors still collapse together
+        df['ModelName'] = df['url'].map(lambda u: groups[u][1] if u in groups else None)
+        df['ModelName'] = df['ModelName'].fillna(df['product_name'].apply(display_name))
+        df['GroupKey'] = [f"g{groups[u][0]}" if u in groups else f"name:{m}"
+                          for u, m in zip(df['url'], df['ModelName'])]
 
         # --- NEW: Extract Day of Week ---
         df['DayOfWeek'] = df['date'].dt.day_name()
@@ -81,25 +88,78 @@ def load_and_process_data():
         return pd.DataFrame()
 
 
+def load_deal_alerts():
+    """Current deals flagged at ingest time by the scraper's deal detector (no history scan needed)."""
+    conn = sqlite3.connect(DB_NAME)
+    rows = latest_deals(conn, limit=500)
+    conn.close()
+    return pd.DataFrame(rows, columns=['url', 'product_name', 'price', 'ew_mean', 'drop_pct', 'z_score',
+                                       'is_all_time_low', 'date'])
+
+
+def search_catalog(query):
+    """
+    Products matching the search box: (url -> bm25 rank, lower is better) and the URLs
+    of every variant in the matched groups, so group averages don't depend on the query.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    results = search_products(conn, query)
+    urls = {url for url, _, _, _ in results}
+    group_ids = sorted({group_id for _, _, group_id, _ in results if group_id is not None})
+    if group_ids:
+        placeholders = ','.join('?' * len(group_ids))
+        urls.update(url for url, in conn.execute(
+            f"SELECT url FROM product_catalog WHERE group_id IN ({placeholders})", group_ids))
+    conn.close()
+    return {url: rank for url, _, _, rank in results}, urls
+
+
+@st.cache_data(max_entries=64)
+def load_product_history(url, db_state):
+    """
+    One product's observations (uses the url/date index), downsampled with LTTB so long
+    high-frequency histories stay cheap to send to the browser. Returns (df, total).
+    Cached per URL until `db_state` (see storage.change_state) changes.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    rows = conn.execute("SELECT date, price FROM products WHERE url = ? ORDER BY date", (url,)).fetchall()
+    conn.close()
+    points = from_points(lttb(to_points(rows), MAX_CHART_POINTS))
+    history = pd.DataFrame(points, columns=['date', 'price'])
+    history['date'] = pd.to_datetime(history['date'])
+    return history, len(rows)
+
+
 # --- Main Application Logic ---
 
 try:
-    df = load_and_process_data()
+    # Sidebar
+    st.sidebar.title("🎯 Settings")
+    search_query = st.sidebar.text_input("Search Products", placeholder="iphone 17 pro / אייפון")
+    search_ranks, group_urls = search_catalog(search_query) if search_query.strip() else (None, None)
+
+    if search_ranks is not None and not search_ranks:
+        st.warning(f"🔍 No products match `{search_query}`. "
+                   "If the search index was never built, run `python product_search.py`.")
+        st.stop()
+
+    # Searching loads whole variant groups (for their averages); only the matches are listed
+    df = load_and_process_data(list(group_urls) if search_ranks else None)
 
     if df is None or df.empty:
-        st.warning(f"⚠️ No data found in `{DB_NAME}`. Please run `main.py` first.")
+        st.warning(f"⚠️ No data found in `{DB_NAME}`. Please run `python ksp.py crawl` first.")
         st.stop()
 
     latest_prices = df.sort_values('date').groupby('url').tail(1).copy()
-    stats = df.groupby('ModelName')['price'].agg(['mean', 'min', 'max']).rename(
+    stats = df.groupby('GroupKey')['price'].agg(['mean', 'min', 'max']).rename(
         columns={'mean': 'avg_price', 'min': 'min_price', 'max': 'max_price'})
-    deals_df = pd.merge(latest_prices, stats, on='ModelName', how='left')
+    deals_df = pd.merge(latest_prices, stats, on='GroupKey', how='left')
     deals_df['avg_price'] = deals_df['avg_price'].fillna(deals_df['price'])
     deals_df['discount_nis'] = deals_df['avg_price'] - deals_df['price']
     deals_df['discount_pct'] = (deals_df['discount_nis'] / deals_df['avg_price']) * 100
+    if search_ranks:
+        deals_df = deals_df[deals_df['url'].isin(search_ranks)]
 
-    # Sidebar
-    st.sidebar.title("🎯 Settings")
     min_budget = st.sidebar.slider("Minimum Budget (NIS)", 0, 10000, 100)
     all_brands = ['All'] + sorted(deals_df['Brand'].unique().tolist())
     selected_brand = st.sidebar.selectbox("Filter by Brand", all_brands)
@@ -107,6 +167,8 @@ try:
     filtered_df = deals_df[deals_df['price'] >= min_budget]
     if selected_brand != 'All':
         filtered_df = filtered_df[filtered_df['Brand'] == selected_brand]
+    if search_ranks:
+        filtered_df = filtered_df.assign(SearchRank=filtered_df['url'].map(search_ranks))
 
     # Dashboard Header
     st.title("🛍️ KSP Price Tracker")
@@ -116,8 +178,15 @@ try:
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Products", f"{len(filtered_df)}")
 
+    alerts_df = load_deal_alerts()
+    alerts_df = alerts_df[alerts_df['url'].isin(filtered_df['url'])]
     valid_deals = filtered_df[filtered_df['discount_pct'] > 1]
-    if not valid_deals.empty:
+    if not alerts_df.empty:
+        best_alert = alerts_df.iloc[0]
+        best_name = filtered_df.loc[filtered_df['url'] == best_alert['url'], 'ModelName'].iloc[0]
+        col2.metric("Best Deal", f"{best_alert['drop_pct']:.1f}% Off", best_name[:15] + "...")
+        col3.metric("Max Saving", f"₪{(alerts_df['ew_mean'] - alerts_df['price']).max():,.0f}")
+    elif not valid_deals.empty:
         best_deal = valid_deals.sort_values('discount_pct', ascending=False).iloc[0]
         col2.metric("Best Deal", f"{best_deal['discount_pct']:.1f}% Off", best_deal['ModelName'][:15] + "...")
         col3.metric("Max Saving", f"₪{valid_deals['discount_nis'].max():,.0f}")
@@ -131,9 +200,11 @@ try:
 
     # Section 1: Table
     st.subheader("📋 Product List")
+    # Best search matches first when searching, most expensive first otherwise
+    table_df = filtered_df.sort_values('SearchRank') if search_ranks else filtered_df.sort_values('price',
+                                                                                                  ascending=False)
     st.dataframe(
-        filtered_df[['Brand', 'ModelName', 'price', 'avg_price', 'discount_pct', 'url']].sort_values('price',
-                                                                                                     ascending=False),
+        table_df[['Brand', 'ModelName', 'price', 'avg_price', 'discount_pct', 'url']],
         column_config={
             "ModelName": "Model",
             "price": st.column_config.NumberColumn("Current Price", format="₪%d"),
@@ -162,6 +233,21 @@ try:
                                  title="Price vs. Discount Distribution")
         st.plotly_chart(fig_scatter, use_container_width=True)
 
+    # --- Product Price History ---
+    st.markdown("---")
+    st.subheader("📈 Price History")
+    history_options = table_df[['url', 'ModelName', 'price']].drop_duplicates('url')
+    if not history_options.empty:
+        labels = {row.url: f"{row.ModelName} (₪{row.price:,.0f})" for row in history_options.itertuples()}
+        selected_url = st.selectbox("Product", list(labels), format_func=labels.get)
+        history_df, total_points = load_product_history(selected_url, change_state(DB_NAME))
+        fig_history = px.line(history_df, x='date', y='price', markers=len(history_df) < 60,
+                              title=f"Price History: {labels[selected_url]}")
+        fig_history.update_layout(yaxis_tickprefix='₪')
+        st.plotly_chart(fig_history, use_container_width=True)
+        if total_points > len(history_df):
+            st.caption(f"Showing {len(history_df)} of {total_points} observations (LTTB downsampled).")
+
     # --- NEW SECTION: BEST DAY ANALYSIS ---
     st.markdown("---")
     st.subheader("📅 Smart Insights: When is the best time to buy?")
@@ -0,0 +1,149 @@
+import math
+import sqlite3
+from datetime import datetime
+
+# --- Configuration ---
+ALPHA = 0.2  # EWMA smoothing factor (weight of the newest observation)
+MIN_OBSERVATIONS = 3  # Don't judge a product before it has some history
+MIN_DROP_PCT = 3.0  # A deal must be at least this much below the running mean...
+Z_THRESHOLD = 2.0  # ...and this many (EW) standard deviations below it
+
+
+# --- Database Management ---
+
+def init_deal_tables(conn):
+    """Creates the detector state and alert tables on an open connection."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS product_stats
+                    (url TEXT PRIMARY KEY,
+                     ew_mean REAL,
+                     ew_var REAL,
+                     min_price REAL,
+                     last_price REAL,
+                     n INTEGER,
+                     updated TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS deal_alerts
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     url TEXT,
+                     product_name TEXT,
+                     price REAL,
+                     ew_mean REAL,
+                     drop_pct REAL,
+                     z_score REAL,
+                     is_all_time_low INTEGER,
+                     date TEXT)''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deal_alerts_date ON deal_alerts (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deal_alerts_url ON deal_alerts (url, date)")
+
+
+def latest_deals(conn, limit=20):
+    """Most recent alert per product, biggest drop first. Empty list if the detector never ran."""
+    try:
+        return conn.execute('''SELECT a.url, a.product_name, a.price, a.ew_mean, a.drop_pct, a.z_score,
+                                      a.is_all_time_low, a.date
+                               FROM deal_alerts a
+                               JOIN product_stats s ON s.url = a.url AND s.last_price = a.price
+                               WHERE a.id = (SELECT MAX(id) FROM deal_alerts WHERE url = a.url)
+                               ORDER BY a.drop_pct DESC
+                               LIMIT ?''', (limit,)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+# --- Streaming Detector ---
+
+class ProductState:
+    __slots__ = ('ew_mean', 'ew_var', 'min_price', 'last_price', 'n')
+
+    def __init__(self, ew_mean, ew_var, min_price, last_price, n):
+        self.ew_mean = ew_mean
+        self.ew_var = ew_var
+        self.min_price = min_price
+        self.last_price = last_price
+        self.n = n
+
+
+class DealDetector:
+    """
+    Keeps O(1) rolling state per product (exponentially weighted mean/variance, running
+    minimum, last price) and flags significant drops as observations are written.
+
+    State lives in `product_stats`, so a restarted scraper picks up where it left off
+    and the dashboard can read "best deals" with a lookup. It is cached in memory only
+    for the current transaction: call reset() before each one, so observations written
+    by another process are never overwritten with stale values, and after a rollback.
+    """
+
+    def __init__(self, alpha=ALPHA, min_observations=MIN_OBSERVATIONS,
+                 min_drop_pct=MIN_DROP_PCT, z_threshold=Z_THRESHOLD):
+        self.alpha = alpha
+        self.min_observations = min_observations
+        self.min_drop_pct = min_drop_pct
+        self.z_threshold = z_threshold
+        self._states = {}
+
+    def reset(self):
+        """Drops the cached state; it is re-read from product_stats (primary-key lookup) on demand."""
+        self._states.clear()
+
+    def _load_state(self, conn, url):
+        state = self._states.get(url)
+        if state is None:
+            row = conn.execute("SELECT ew_mean, ew_var, min_price, last_price, n FROM product_stats WHERE url = ?",
+                               (url,)).fetchone()
+            if row:
+                state = ProductState(*row)
+                self._states[url] = state
+        return state
+
+    def observe(self, conn, url, name, price, date=None):
+        """
+        Feeds one observation through the detector inside the caller's transaction.
+        Returns the alert row (dict) if the price is a significant drop, else None.
+        """
+        date = date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        state = self._load_state(conn, url)
+        alert = None
+
+        if state is None:
+            state = ProductState(price, 0.0, price, price, 0)
+            self._states[url] = state
+        else:
+            # Judge the new price against the history *before* it is folded in
+            if state.n >= self.min_observations and price < state.ew_mean:
+                drop_pct = (state.ew_mean - price) / state.ew_mean * 100
+                std = math.sqrt(state.ew_var)
+                z_score = (state.ew_mean - price) / std if std > 0 else math.inf
+                if drop_pct >= self.min_drop_pct and z_score >= self.z_threshold:
+                    alert = {
+                        'url': url,
+                        'product_name': name,
+                        'price': price,
+                        'ew_mean': state.ew_mean,
+                        'drop_pct': drop_pct,
+                        'z_score': min(z_score, 1e9),
+                        'is_all_time_low': int(price < state.min_price),
+                        'date': date,
+                    }
+
+            # Incremental EW mean/variance (West, 1979)
+            diff = price - state.ew_mean
+            incr = self.alpha * diff
+            state.ew_mean += incr
+            state.ew_var = (1 - self.alpha) * (state.ew_var + diff * incr)
+            state.min_price = min(state.min_price, price)
+            state.last_price = price
+
+        state.n += 1
+        conn.execute('''INSERT INTO product_stats (url, ew_mean, ew_var, min_price, last_price, n, updated)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(url) DO UPDATE SET
+                            ew_mean = excluded.ew_mean, ew_var = excluded.ew_var,
+                            min_price = excluded.min_price, last_price = excluded.last_price,
+                            n = excluded.n, updated = excluded.updated''',
+                     (url, state.ew_mean, state.ew_var, state.min_price, state.last_price, state.n, date))
+        if alert:
+            conn.execute('''INSERT INTO deal_alerts
+                            (url, product_name, price, ew_mean, drop_pct, z_score, is_all_time_low, date)
+                            VALUES (:url, :product_name, :price, :ew_mean, :drop_pct, :z_score,
+                                    :is_all_time_low, :date)''', alert)
+        return alert
@@ -2,10 +2,10 @@ import sqlite3
 import random
 from datetime import datetime, timedelta
 
-DB_NAME = 'market_pulse.db'
+from config import DB_NAME
 
 
-def generate_mock_history():
+def generate_mock_history(days=30):
     """
     Utility script to backfill the database with synthetic historical data.
     This allows visualizing trends without waiting for weeks of real data accumulation.
@@ -16,7 +16,7 @@ def generate_mock_history():
     c = conn.cursor()
 
     # 1. Fetch current real products
-    c.execute("SELECT DISTINCT product_name, price, url FROM prices ORDER BY date DESC")
+    c.execute("SELECT DISTINCT name, price, url FROM products ORDER BY date DESC")
     real_products = c.fetchall()
 
     # Deduplicate (keep latest)
@@ -25,13 +25,13 @@ def generate_mock_history():
         if name not in unique_products:
             unique_products[name] = (price, url)
 
-    print(f"Found {len(unique_products)} unique products. Backfilling 30 days...")
+    print(f"Found {len(unique_products)} unique products. Backfilling {days} days...")
 
-    # 2. Generate 30-day history for each product
+    # 2. Generate history for each product
     new_records = 0
 
     for name, (current_price, url) in unique_products.items():
-        for days_back in range(1, 31):
+        for days_back in range(1, days + 1):
             date_time = datetime.now() - timedelta(days=days_back)
             date_str = date_time.strftime("%Y-%m-%d %H:%M:%S")
 
@@ -49,7 +49,7 @@ def generate_mock_history():
             past_price = round(past_price / 10) * 10
             if past_price < 100: past_price = current_price  # Sanity check
 
-            c.execute("INSERT INTO prices (product_name, price, url, date) VALUES (?, ?, ?, ?)",
+            c.execute("INSERT INTO products (name, price, url, date) VALUES (?, ?, ?, ?)",
                       (name, past_price, url, date_str))
             new_records += 1
 
@@ -0,0 +1,130 @@
+"""
+ksp - single entry point for the KSP Price Tracker.
+
+    python ksp.py crawl [--schedule HH:MM]   Bulldozer scraper (main.py), once or daily
+    python ksp.py harvest                    JSON-LD scraper (market_pulse.py)
+    python ksp.py report [--limit N]         Latest prices and current deals
+    python ksp.py backfill                   Rebuild the product catalog/search index
+    python ksp.py backfill --import-legacy   Import market_pulse.db/prices.db history + index
+    python ksp.py --db demo.db backfill --synthetic [--days N]   Random demo history + index
+    python ksp.py serve [--port N]           Read-only HTTP API (api.py)
+
+Heavy dependencies (selenium, webdriver_manager, schedule) are imported inside the
+subcommand that needs them, so quick commands like `report` start in milliseconds.
+"""
+import argparse
+import os
+import sys
+import time
+
+
+# --- Subcommands (imports are deliberately local) ---
+
+def cmd_crawl(args):
+    import main
+    if args.schedule:
+        main.run_scheduler(args.schedule)
+    else:
+        main.main()
+
+
+def cmd_harvest(args):
+    import market_pulse
+    market_pulse.main()
+
+
+def cmd_report(args):
+    import sqlite3
+    from config import DB_NAME
+    from deal_detector import latest_deals
+    from storage import view_results
+
+    if not view_results(args.limit):
+        sys.exit(1)
+    conn = sqlite3.connect(DB_NAME)
+    deals = latest_deals(conn, args.limit)
+    conn.close()
+    if deals:
+        print("CURRENT DEALS")
+        print("-" * 60)
+        for url, name, price, avg, drop_pct, _, is_low, _ in deals:
+            print(f"{price:<10} | -{drop_pct:4.1f}% (avg {avg:,.0f}){' ⭐' if is_low else ''} | {name[:40]}")
+        print("=" * 60 + "\n")
+
+
+def cmd_backfill(args):
+    from product_search import build_search_index
+    if args.import_legacy:
+        from config import DB_NAME, LEGACY_DBS
+        from storage import import_legacy, init_db
+        init_db()
+        for path, default_url in LEGACY_DBS.items():
+            if os.path.exists(path):
+                print(f"📥 Imported {import_legacy(path, default_url)} rows from {path} into {DB_NAME}.")
+    elif args.synthetic and not args.index_only:
+        # Random prices look exactly like real rows, so this is opt-in (use a separate --db)
+        from generate_history import generate_mock_history
+        generate_mock_history(args.days)
+    build_search_index()
+
+
+def cmd_serve(args):
+    import api
+    api.serve(host=args.host, port=args.port, quiet=args.quiet)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ksp', description="KSP Price Tracker command line.")
+    parser.add_argument('--db', help="SQLite database to use (default: $KSP_DB or ksp_prices.db)")
+    parser.add_argument('--profile', choices=['cpu', 'mem', 'all'],
+                        help="Write CPU and/or memory profiles (same as KSP_PROFILE=<mode>)")
+    parser.add_argument('--timing', action='store_true', help="Print how long the subcommand's imports took")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('crawl', help="Scrape the category with the bulldozer scraper")
+    p.add_argument('--schedule', metavar='HH:MM', help="Keep running and crawl every day at this time")
+    p.set_defaults(func=cmd_crawl, modules=['main'])
+
+    p = sub.add_parser('harvest', help="Scrape the category with the JSON-LD scraper")
+    p.set_defaults(func=cmd_harvest, modules=['market_pulse'])
+
+    p = sub.add_parser('report', help="Print the latest prices and current deals")
+    p.add_argument('--limit', type=int, default=20)
+    p.set_defaults(func=cmd_report, modules=['storage'])
+
+    p = sub.add_parser('backfill', help="Rebuild the catalog/search index, optionally importing history first")
+    p.add_argument('--index-only', action='store_true',
+                   help="Only rebuild product groups and the search index (the default)")
+    p.add_argument('--import-legacy', action='store_true', help="Import history from market_pulse.db/prices.db")
+    p.add_argument('--synthetic', action='store_true',
+                   help="Add random demo history (indistinguishable from real rows: use a separate --db)")
+    p.add_argument('--days', type=int, default=30, help="Days of synthetic history")
+    p.set_defaults(func=cmd_backfill, modules=['generate_history', 'product_search'])
+
+    p = sub.add_parser('serve', help="Serve the read-only HTTP API")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8000)
+    p.add_argument('--quiet', action='store_true')
+    p.set_defaults(func=cmd_serve, modules=['api'])
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Must be set before the subcommand imports config/profiling
+    if args.db:
+        os.environ['KSP_DB'] = args.db
+    if args.profile:
+        os.environ['KSP_PROFILE'] = args.profile
+
+    if args.timing:
+        start = time.perf_counter()
+        for module in args.modules:
+            __import__(module)
+        print(f"[Timing] {args.command}: imports took {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"({len(sys.modules)} modules loaded)")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
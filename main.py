@@ -1,4 +1,3 @@
-import sqlite3
 import time
 import re  # IMPORT REGEX FOR BULLDOZER
 from datetime import datetime
@@ -6,66 +5,28 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
-
-
-# ==========================================
-# PART 1: Database Management
-# ==========================================
-
-def init_db():
-    conn = sqlite3.connect('ksp_prices.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS products
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  name TEXT,
-                  price REAL,
-                  url TEXT,
-                  date TEXT)''')
-    conn.commit()
-    conn.close()
-
-
-def save_product(name, price, url):
-    conn = sqlite3.connect('ksp_prices.db')
-    c = conn.cursor()
-    current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("INSERT INTO products (name, price, url, date) VALUES (?, ?, ?, ?)",
-              (name, price, url, current_date))
-    conn.commit()
-    conn.close()
-    print(f"[DB] Saved: {name[:30]}... | {price} NIS")
-
-
-def view_results():
-    conn = sqlite3.connect('ksp_prices.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM products ORDER BY id DESC LIMIT 20")
-    rows = c.fetchall()
-
-    print("\n" + "=" * 60)
-    print("FINAL REPORT")
-    print("=" * 60)
-    print(f"{'Price':<10} | {'Name'}")
-    print("-" * 60)
-    for row in rows:
-        print(f"{row[2]:<10} | {row[1][:60]}")
-    print("=" * 60 + "\n")
-    conn.close()
+from config import CATEGORY_URL
+from run_metrics import RunMetrics
+from profiling import profiled
+from storage import init_db, save_product, view_results  # PART 1: Database Management lives in storage.py
 
 
 # ==========================================
 # PART 2: The Scraper Logic
 # ==========================================
 
-def get_category_links(driver, category_url):
+def get_category_links(driver, category_url, metrics=None):
+    metrics = metrics or RunMetrics('adhoc')
     print(f"\n[Scraper] Accessing category...")
-    driver.get(category_url)
-    time.sleep(5)
+    with metrics.stage('category_load'):
+        driver.get(category_url)
+    metrics.sleep(5)
 
     # Scroll down to load items
     for i in range(3):
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
+        with metrics.stage('scroll'):
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        metrics.sleep(2)
 
     elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='/item/']")
     links = []
@@ -78,17 +39,29 @@ def get_category_links(driver, category_url):
     return links
 
 
-def extract_product_details(driver, product_url):
+def extract_product_details(driver, product_url, metrics=None):
     """
     THE BULLDOZER METHOD 🚜
     1. Grab ALL text from the page.
     2. Use Regex to find any number that looks like a price near a Shekel sign.
     3. Take the MAX price found (assumes product price > shipping/installments).
     """
+    metrics = metrics or RunMetrics('adhoc')
     print(f"   [Debug] Navigating to: {product_url}")
-    driver.get(product_url)
-    time.sleep(5)
+    with metrics.stage('navigate'):
+        driver.get(product_url)
+    metrics.sleep(5)
+
+    with metrics.stage('extract'):
+        product_name, price = _bulldozer_extract(driver)
 
+    if not price:
+        print("   [Failure] Could not find price.")
+
+    return product_name, price
+
+
+def _bulldozer_extract(driver):
     product_name = driver.title
     price = None
 
@@ -130,9 +103,6 @@ def extract_product_details(driver, product_url):
     except:
         pass
 
-    if not price:
-        print("   [Failure] Could not find price.")
-
     return product_name, price
 
 
@@ -140,16 +110,18 @@ def extract_product_details(driver, product_url):
 # PART 3: The Manager
 # ==========================================
 
+@profiled('crawl')
 def main():
     init_db()
-    # iPhone Category URL
-    CATEGORY_URL = "https://ksp.co.il/web/cat/31635..61633..573"
 
     print("🚀 Starting Main Scraper (Bulldozer Mode)...")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-
+    metrics = RunMetrics('crawl')
+    driver = None
     try:
-        links = get_category_links(driver, CATEGORY_URL)
+        with metrics.stage('driver_start'):
+            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
+
+        links = get_category_links(driver, CATEGORY_URL, metrics)
 
 
         links_to_scan = links
@@ -158,26 +130,26 @@ def main():
         for i, link in enumerate(links_to_scan, 1):
             print(f"\n--- Item {i} ---")
             try:
-                name, price = extract_product_details(driver, link)
+                name, price = extract_product_details(driver, link, metrics)
                 if price:
-                    save_product(name, price, link)
+                    with metrics.stage('save'):
+                        save_product(name, price, link)
+                    metrics.count('product', True)
                 else:
+                    metrics.count('product', False)
                     print("[Warning] No price found.")
             except Exception as e:
+                metrics.count('product', False)
                 print(f"[Error] {e}")
 
         view_results()
 
     finally:
-        driver.quit()
-
-
-import schedule  # Don't forget to add this at the very top of the file!
-import time  # Ensure this is imported as well
+        if driver:
+            driver.quit()
+        metrics.write_reports()
 
 
-# ... (All your existing functions: init_db, save_product, etc.) ...
-
 # ==========================================
 # PART 4: Scheduler Integration
 # ==========================================
@@ -201,12 +173,14 @@ def job():
     print("💤 [Scheduler] Scan finished. Going back to sleep...")
 
 
-if __name__ == "__main__":
+def run_scheduler(at="12:50"):
+    import schedule  # Only the long-running scheduler needs it
+
     print("🚀 Scheduler started! The script is now running in the background.")
-    print("📅 Schedule: Runs every day at 19:00.")
+    print(f"📅 Schedule: Runs every day at {at}.")
 
-    # Schedule the job to run every day at a specific time (e.g., 7:00 PM)
-    schedule.every().day.at("12:50").do(job)
+    # Schedule the job to run every day at a specific time
+    schedule.every().day.at(at).do(job)
 
     # Optional: Run once immediately to verify everything works
     # print("⚡ Running an immediate test scan...")
@@ -218,4 +192,8 @@ if __name__ == "__main__":
             schedule.run_pending()
             time.sleep(60)  # Check every minute
     except KeyboardInterrupt:
-        print("\n🛑 Scheduler stopped manually.")
\ No newline at end of file
+        print("\n🛑 Scheduler stopped manually.")
+
+
+if __name__ == "__main__":
+    run_scheduler()
\ No newline at end of file
@@ -0,0 +1,281 @@
+import math
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+
+from config import DB_NAME
+
+# --- Configuration ---
+SIMILARITY_THRESHOLD = 0.8  # Jaccard similarity of model tokens needed to join a group
+
+# KSP titles are "<model> - צבע <color> - <warranty> - ...". Only the first segment names the model.
+SEGMENT_SEPARATOR = ' - '
+CAPACITY_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(GB|TB|MB)\b', re.IGNORECASE)
+SKU_RE = re.compile(r'\S*\d\S*[-/]\S*|\S*[-/]\S*\d\S*')  # e.g. SM-S938B/DS, SDSSDE82-4T00-G25
+# A '+' glued to a model word ("Pro+", "S24+") is a variant marker; between capacities ("8GB+256GB") it is not
+TOKEN_RE = re.compile(r'[a-z0-9]+|(?<=[a-z0-9])\+|[\u0590-\u05ff]+')
+
+# Brands are reported separately (see identify_brand) and are not always present in the title
+BRAND_TOKENS = {'apple', 'samsung', 'xiaomi', 'google', 'logitech', 'oneplus', 'sony', 'lg'}
+# Known colors that can appear inside the model segment. The matcher adds every color it sees
+# in a "צבע <color>" segment, so new colors ("Cosmic Orange") are recognized inline too.
+INLINE_COLOR_TOKENS = {'black', 'white', 'silver', 'gold', 'blue', 'titanium', 'natural', 'green', 'pink',
+                       'yellow', 'purple', 'gray', 'grey', 'שחור', 'לבן', 'כסף', 'זהב', 'כחול', 'טיטניום',
+                       'טבעי', 'ירוק', 'ורוד', 'צהוב', 'סגול', 'אפור'}
+NOISE_TOKENS = {'ram', 'ו'}
+COLOR_PREFIX = 'צבע'
+# Words that name a different model rather than a variant: like numbers, they must match exactly
+VARIANT_TOKENS = {'pro', 'plus', 'max', 'ultra', 'mini', 'lite', 'fe', 'air', 'edge', 'neo'}
+
+
+# --- Tokenizing ---
+
+def model_segment(name):
+    """The part of a KSP title that names the model (drops color/warranty/accessory segments)."""
+    return str(name).split(SEGMENT_SEPARATOR)[0]
+
+
+def capacity_tokens(name):
+    """All storage/RAM sizes in the title, normalized: '12GB+256GB' -> {'12gb', '256gb'}."""
+    return frozenset(f"{float(n):g}{unit.lower()}" for n, unit in CAPACITY_RE.findall(str(name)))
+
+
+def color_tokens(name):
+    """Words of a title's "צבע <color>" segment: '... - צבע Deep Blue - ...' -> {'deep', 'blue'}."""
+    tokens = set()
+    for segment in str(name).split(SEGMENT_SEPARATOR)[1:]:
+        words = segment.split()
+        if words and words[0] == COLOR_PREFIX:
+            tokens.update(t for t in TOKEN_RE.findall(' '.join(words[1:]).lower())
+                          if t not in VARIANT_TOKENS and t != '+' and not any(ch.isdigit() for ch in t))
+    return tokens
+
+
+def model_tokens(name, colors=INLINE_COLOR_TOKENS):
+    """
+    Distinguishing tokens of the model segment: capacity, SKU codes, parentheses,
+    brand and color words are removed, and '+' is spelled 'plus' ("S24+" == "S24 Plus").
+    Hebrew descriptive words ("אייפון", "טלפון סלולרי") are only kept when the title
+    has no Latin model words at all.
+    """
+    segment = model_segment(name)
+    segment = re.sub(r'\([^)]*\)', ' ', segment)
+    segment = CAPACITY_RE.sub(' ', segment)
+    segment = SKU_RE.sub(' ', segment)
+    tokens = ['plus' if t == '+' else t for t in TOKEN_RE.findall(segment.lower())
+              if t not in BRAND_TOKENS and t not in colors and t not in NOISE_TOKENS]
+    latin = [t for t in tokens if t.isascii()]
+    return frozenset(latin if latin else tokens)
+
+
+def display_name(name, colors=INLINE_COLOR_TOKENS):
+    """Human-readable group label: the model segment without color words."""
+    words = [w for w in model_segment(name).split() if w.lower() not in colors]
+    return ' '.join(words).strip()
+
+
+def _hard(tokens):
+    """Model tokens that must be identical for two titles to match: numbers and variant words."""
+    return frozenset(t for t in tokens if t in VARIANT_TOKENS or any(ch.isdigit() for ch in t))
+
+
+def _jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+# --- Database Management ---
+
+def init_matcher_tables(conn):
+    """Creates the variant-group tables on an open connection."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS product_groups
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     label TEXT,
+                     model_tokens TEXT,
+                     capacity TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS product_catalog
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     url TEXT UNIQUE,
+                     name TEXT,
+                     group_id INTEGER REFERENCES product_groups (id))''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_catalog_group ON product_catalog (group_id)")
+
+
+def lookup_groups(conn):
+    """url -> (group_id, label) for every product in the catalog. Empty if it was never built."""
+    try:
+        rows = conn.execute('''SELECT c.url, g.id, g.label
+                               FROM product_catalog c JOIN product_groups g ON g.id = c.group_id''').fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {url: (group_id, label) for url, group_id, label in rows}
+
+
+# --- Matching Index ---
+
+class ProductMatcher:
+    """
+    Groups product variants (colors, packaging) while keeping models and capacities apart.
+
+    Each group is indexed by its model and capacity tokens in an inverted index, so a new
+    title is compared only with groups that share its rarest tokens instead of with every
+    known product. Two titles match when their capacities, numeric model tokens and variant
+    words (Pro, Plus, Max, ...) are identical and the Jaccard similarity of their model
+    tokens reaches the threshold. Color words are learned from the "צבע" segments seen
+    so far and ignored when comparing, including in groups created before they were learned.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.groups = {}  # group_id -> (model tokens, capacity tokens, hard model tokens)
+        self.index = defaultdict(set)  # token -> {group_id, ...}
+        self.colors = set(INLINE_COLOR_TOKENS)
+        self._last_group_id = 0
+        self._tables_ready = False
+
+    def refresh(self, conn):
+        """
+        Adds groups persisted since the last call, including those created by other
+        processes, to the in-memory index. Groups are never modified, so this only
+        reads new rows (a primary-key range scan).
+        """
+        if not self._tables_ready:
+            init_matcher_tables(conn)
+            for name, in conn.execute("SELECT name FROM product_catalog"):
+                self.colors |= color_tokens(name)
+            self._tables_ready = True
+        for group_id, tokens, capacity in conn.execute(
+                "SELECT id, model_tokens, capacity FROM product_groups WHERE id > ? ORDER BY id",
+                (self._last_group_id,)):
+            self._add_group(group_id, frozenset(tokens.split()), frozenset(capacity.split()))
+
+    def reset(self):
+        """Drops the index, e.g. after a rollback discarded groups it already holds."""
+        self.groups.clear()
+        self.index.clear()
+        self.colors = set(INLINE_COLOR_TOKENS)
+        self._last_group_id = 0
+        self._tables_ready = False
+
+    def _add_group(self, group_id, tokens, capacity):
+        self.groups[group_id] = (tokens, capacity, _hard(tokens))
+        self._last_group_id = max(self._last_group_id, group_id)
+        for token in tokens | capacity:
+            self.index[token].add(group_id)
+
+    def _candidates(self, tokens, capacity, hard_tokens):
+        # Prefix filter: a match shares >= ceil(t*|x|) model tokens, all hard ones included,
+        # so it must contain at least one of the (|soft| - needed + 1) rarest soft tokens
+        soft = sorted(tokens - hard_tokens, key=lambda t: len(self.index.get(t, ())))
+        needed = math.ceil(self.threshold * len(tokens)) - len(hard_tokens)
+        prefix = [self.index.get(t, set()) for t in soft[:len(soft) - needed + 1]] if needed > 0 else []
+
+        hard = capacity | hard_tokens
+        if not hard:
+            return set().union(*prefix)
+        # Every match must contain all hard tokens: intersect their postings, rarest first
+        postings = sorted((self.index.get(t, set()) for t in hard), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        if prefix:
+            candidates = [g for g in candidates if any(g in posting for posting in prefix)]
+        return candidates
+
+    def find_group(self, name):
+        """Best matching existing group id for a title, or None."""
+        tokens, capacity = model_tokens(name, self.colors), capacity_tokens(name)
+        hard_tokens = _hard(tokens)
+        best_id, best_score = None, 0.0
+        for group_id in self._candidates(tokens, capacity, hard_tokens):
+            group_tokens, group_capacity, group_hard = self.groups[group_id]
+            if group_capacity != capacity or group_hard != hard_tokens:
+                continue
+            score = _jaccard(tokens, group_tokens - self.colors)
+            if score >= self.threshold and score > best_score:
+                best_id, best_score = group_id, score
+        return best_id
+
+    def assign(self, conn, url, name):
+        """
+        Returns the group id for a product, creating the group and/or the catalog row if
+        needed. Runs inside the caller's transaction.
+        """
+        self.refresh(conn)
+        self.colors |= color_tokens(name)
+        known = conn.execute("SELECT name, group_id FROM product_catalog WHERE url = ?", (url,)).fetchone()
+        if known and known[0] == name:
+            return known[1]
+
+        group_id = self.find_group(name)
+        if group_id is None:
+            tokens, capacity = model_tokens(name, self.colors), capacity_tokens(name)
+            cur = conn.execute("INSERT INTO product_groups (label, model_tokens, capacity) VALUES (?, ?, ?)",
+                               (display_name(name, self.colors), ' '.join(sorted(tokens)), ' '.join(sorted(capacity))))
+            group_id = cur.lastrowid
+            self._add_group(group_id, tokens, capacity)
+
+        conn.execute('''INSERT INTO product_catalog (url, name, group_id) VALUES (?, ?, ?)
+                        ON CONFLICT(url) DO UPDATE SET name = excluded.name, group_id = excluded.group_id''',
+                     (url, name, group_id))
+        return group_id
+
+
+def backfill_groups(db_name=DB_NAME):
+    """Assigns groups to every product already stored in `products` (safe to re-run)."""
+    conn = sqlite3.connect(db_name)
+    matcher = ProductMatcher()
+    rows = conn.execute('''SELECT url, name FROM products
+                           WHERE id IN (SELECT MAX(id) FROM products GROUP BY url)''').fetchall()
+    for url, name in rows:
+        matcher.assign(conn, url, name)
+    conn.commit()
+    conn.close()
+    print(f"✅ Grouped {len(rows)} products into {len(matcher.groups)} model groups.")
+
+
+# --- Sanity Check ---
+
+# Titles every check matcher has seen first, so it has learned their colors
+CHECK_SEEN_TITLES = [
+    "Apple iPhone 17 Pro Max 256GB - צבע Deep Blue - שנה אחריות יבואן רשמי",
+    "Apple iPhone 17 Pro Max 256GB - צבע Cosmic Orange - שנה אחריות יבואן רשמי",
+]
+# (title, title, should share a group)
+CHECK_PAIRS = [
+    ("Xiaomi Redmi Note 14 Pro 5G 8GB+256GB - צבע שחור", "Xiaomi Redmi Note 14 Pro 5G 8GB+256GB - צבע כחול", True),
+    ("iPhone 17 Pro 256GB - צבע Deep Blue", "iPhone 17 Pro 256GB - צבע Silver", True),
+    ("Xiaomi Redmi Note 14 Pro 5G 8GB+256GB", "Xiaomi Redmi Note 14 Pro Plus 5G 8GB+256GB", False),
+    ("Xiaomi Redmi Note 14 Pro 5G 8GB+256GB", "Xiaomi Redmi Note 14 Pro+ 5G 8GB+256GB", False),
+    ("Xiaomi Redmi Note 14 5G 8GB+256GB", "Xiaomi Redmi Note 14 Pro 5G 8GB+256GB", False),
+    ("iPhone 17 Pro 256GB", "iPhone 17 Pro Max 256GB", False),
+    ("Samsung Galaxy S24+ 256GB", "Samsung Galaxy S24 Plus 256GB", True),
+    ("Samsung Galaxy S24 256GB", "Samsung Galaxy S24+ 256GB", False),
+    ("Apple iPhone 17 Pro 256GB Deep Blue", "Apple iPhone 17 Pro 256GB Cosmic Orange", True),
+    ("Samsung Galaxy S25 Ultra 12GB+256GB", "Samsung Galaxy S25 Ultra 12GB+512GB", False),
+]
+
+
+def check_matching():
+    """Runs CHECK_PAIRS through a fresh matcher on an in-memory DB. Returns the failing pairs."""
+    failures = []
+    for first, second, expected in CHECK_PAIRS:
+        conn = sqlite3.connect(':memory:')
+        matcher = ProductMatcher()
+        for i, title in enumerate(CHECK_SEEN_TITLES):
+            matcher.assign(conn, f"seen{i}", title)
+        same = matcher.assign(conn, 'a', first) == matcher.assign(conn, 'b', second)
+        conn.close()
+        if same != expected:
+            failures.append((first, second, expected))
+    return failures
+
+
+if __name__ == "__main__":
+    if '--check' in sys.argv[1:]:
+        failed = check_matching()
+        for first, second, expected in failed:
+            print(f"❌ Expected {'one group' if expected else 'two groups'}: {first!r} / {second!r}")
+        print(f"{'✅' if not failed else '❌'} {len(CHECK_PAIRS) - len(failed)}/{len(CHECK_PAIRS)} matching checks passed.")
+        sys.exit(1 if failed else 0)
+    backfill_groups()
@@ -0,0 +1,81 @@
+import re
+import sqlite3
+
+from config import DB_NAME
+from product_matcher import backfill_groups, init_matcher_tables
+
+# --- Configuration ---
+MAX_RESULTS = 200
+QUERY_TOKEN_RE = re.compile(r'\w+')
+
+
+# --- Database Management ---
+
+def init_search_index(conn):
+    """
+    Creates the FTS5 index over product_catalog names and the triggers that keep it in
+    sync, so every catalog write (see product_matcher.assign) updates the index in the
+    same transaction. The index is rebuilt once when it is first created.
+    """
+    init_matcher_tables(conn)
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='product_fts'").fetchone()
+    # unicode61 folds case and splits on punctuation for both Hebrew and Latin script
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5
+                    (name, content='product_catalog', content_rowid='id',
+                     tokenize="unicode61 remove_diacritics 2", prefix='2 3')''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS product_catalog_ai AFTER INSERT ON product_catalog BEGIN
+                        INSERT INTO product_fts (rowid, name) VALUES (new.id, new.name);
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS product_catalog_ad AFTER DELETE ON product_catalog BEGIN
+                        INSERT INTO product_fts (product_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS product_catalog_au AFTER UPDATE OF name ON product_catalog BEGIN
+                        INSERT INTO product_fts (product_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                        INSERT INTO product_fts (rowid, name) VALUES (new.id, new.name);
+                    END''')
+    if not exists:
+        conn.execute("INSERT INTO product_fts (product_fts) VALUES ('rebuild')")
+
+
+def build_match_query(text):
+    """
+    Turns free text into an FTS5 query: every word must match as a prefix.
+    'iphone 17 pr' -> '"iphone"* "17"* "pr"*'. Returns None if there is nothing to search.
+    """
+    tokens = QUERY_TOKEN_RE.findall(str(text))
+    if not tokens:
+        return None
+    return ' '.join(f'"{t}"*' for t in tokens)
+
+
+def search_products(conn, text, limit=MAX_RESULTS):
+    """
+    Best matches first (bm25): list of (url, name, group_id, rank).
+    Returns an empty list if the query is empty or the index was never built.
+    """
+    query = build_match_query(text)
+    if not query:
+        return []
+    try:
+        return conn.execute('''SELECT c.url, c.name, c.group_id, product_fts.rank
+                               FROM product_fts JOIN product_catalog c ON c.id = product_fts.rowid
+                               WHERE product_fts MATCH ?
+                               ORDER BY product_fts.rank
+                               LIMIT ?''', (query, limit)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def build_search_index(db_name=DB_NAME):
+    """Creates the index (if needed) and catalogs any products that were never grouped."""
+    conn = sqlite3.connect(db_name)
+    init_search_index(conn)
+    # Search results pull history per URL, so make that lookup indexed too
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_url_date ON products (url, date)")
+    conn.commit()
+    conn.close()
+    backfill_groups(db_name)
+
+
+if __name__ == "__main__":
+    build_search_index()
@@ -0,0 +1,160 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from run_metrics import REPORT_DIR
+
+# --- Configuration ---
+PROFILE_ENV = 'KSP_PROFILE'  # KSP_PROFILE=cpu (or 1), mem or all
+TOP_N = 30
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples for the flamegraph
+
+
+def profile_modes():
+    """
+    Which profilers KSP_PROFILE asks for: {'cpu'}, {'mem'}, both ('all'), or none.
+    tracemalloc slows allocation-heavy code down several times, so it only runs together
+    with the CPU profilers when asked for explicitly.
+    """
+    value = os.environ.get(PROFILE_ENV, '').strip().lower()
+    if value in ('', '0', 'false', 'no'):
+        return set()
+    if value == 'mem':
+        return {'mem'}
+    if value == 'all':
+        return {'cpu', 'mem'}
+    return {'cpu'}
+
+
+def profiling_enabled():
+    return bool(profile_modes())
+
+
+class _StackSampler(threading.Thread):
+    """
+    Periodically samples the call stack of one thread and counts collapsed stacks
+    ("outer;inner;leaf" -> samples), the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, target_thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _write_cpu_reports(prefix, profiler, sampler, top_n):
+    # 1. Raw cProfile stats (open with snakeviz / gprof2dot / pstats)
+    profiler.dump_stats(prefix + '.prof')
+
+    # 2. Collapsed stacks for flamegraph tools
+    with open(prefix + '.folded', 'w', encoding='utf-8') as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    # 3. CPU top-N
+    buf = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buf).strip_dirs()
+    buf.write(f"=== Top {top_n} by cumulative time ===\n")
+    stats.sort_stats('cumulative').print_stats(top_n)
+    buf.write(f"=== Top {top_n} by own time ===\n")
+    stats.sort_stats('tottime').print_stats(top_n)
+    with open(prefix + '_cpu_top.txt', 'w', encoding='utf-8') as f:
+        f.write(buf.getvalue())
+
+
+def _write_mem_report(prefix, snapshot_start, snapshot_end, peak_bytes, top_n):
+    # Memory top-N (allocations still alive at the end, and growth during the run)
+    # Hide the profiler's own bookkeeping so it doesn't crowd out real allocation sites
+    noise = [tracemalloc.Filter(False, tracemalloc.__file__),
+             tracemalloc.Filter(False, threading.__file__),
+             tracemalloc.Filter(False, __file__)]
+    snapshot_start = snapshot_start.filter_traces(noise)
+    snapshot_end = snapshot_end.filter_traces(noise)
+    with open(prefix + '_mem_top.txt', 'w', encoding='utf-8') as f:
+        f.write(f"Peak traced memory: {peak_bytes / 1024 / 1024:.2f} MiB\n\n")
+        f.write(f"=== Top {top_n} allocation sites (live at end of run) ===\n")
+        for stat in snapshot_end.statistics('lineno')[:top_n]:
+            f.write(f"{stat}\n")
+        f.write(f"\n=== Top {top_n} allocation sites by growth during the run ===\n")
+        for stat in snapshot_end.compare_to(snapshot_start, 'lineno')[:top_n]:
+            f.write(f"{stat}\n")
+
+
+def profiled(run_name, report_dir=REPORT_DIR, top_n=TOP_N):
+    """
+    Decorator that profiles the wrapped function when KSP_PROFILE is set, otherwise a no-op.
+
+    Writes next to the run reports:
+        <run>_<timestamp>.prof          cProfile stats                              (cpu)
+        <run>_<timestamp>.folded        collapsed stacks (flamegraph.pl / speedscope) (cpu)
+        <run>_<timestamp>_cpu_top.txt   top-N functions by cumulative and own time  (cpu)
+        <run>_<timestamp>_mem_top.txt   top-N allocation sites (tracemalloc)        (mem)
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            modes = profile_modes()
+            if not modes:
+                return func(*args, **kwargs)
+
+            os.makedirs(report_dir, exist_ok=True)
+            prefix = os.path.join(report_dir, f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+            trace_memory = 'mem' in modes and not tracemalloc.is_tracing()
+            if trace_memory:
+                tracemalloc.start()
+            if 'mem' in modes:
+                snapshot_start = tracemalloc.take_snapshot()
+            if 'cpu' in modes:
+                sampler = _StackSampler(threading.get_ident())
+                profiler = cProfile.Profile()
+
+            start = time.perf_counter()
+            if 'cpu' in modes:
+                sampler.start()
+                profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if 'cpu' in modes:
+                    profiler.disable()
+                    sampler.stop()
+                    _write_cpu_reports(prefix, profiler, sampler, top_n)
+                if 'mem' in modes:
+                    snapshot_end = tracemalloc.take_snapshot()
+                    peak_bytes = tracemalloc.get_traced_memory()[1]
+                    if trace_memory:
+                        tracemalloc.stop()
+                    _write_mem_report(prefix, snapshot_start, snapshot_end, peak_bytes, top_n)
+                print(f"[Profile] {run_name} took {time.perf_counter() - start:.2f}s "
+                      f"({'+'.join(sorted(modes))}). Profiles written to {prefix}.*")
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Configuration ---
+REPORT_DIR = 'reports'
+QUANTILES = (0.5, 0.95)
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (same convention as numpy's default)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class RunMetrics:
+    """
+    Collects per-stage timings and outcome counters for a single scraper run.
+
+    Usage:
+        metrics = RunMetrics('crawl')
+        with metrics.stage('navigate'):
+            driver.get(url)
+        metrics.sleep(5)
+        metrics.write_reports()
+    """
+
+    def __init__(self, run_name):
+        self.run_name = run_name
+        self.started_at = datetime.now()
+        self._t0 = time.perf_counter()
+        self.durations = defaultdict(list)
+        self.outcomes = defaultdict(lambda: {'success': 0, 'failure': 0})
+
+    @contextmanager
+    def stage(self, name):
+        """Times the wrapped block. An exception counts as a failure and is re-raised."""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.durations[name].append(time.perf_counter() - start)
+            self.outcomes[name]['success' if ok else 'failure'] += 1
+
+    def sleep(self, seconds):
+        """time.sleep() that is accounted for under the 'sleep' stage."""
+        with self.stage('sleep'):
+            time.sleep(seconds)
+
+    def count(self, name, success):
+        """Records an outcome that is not tied to a timed block (e.g. 'no price found')."""
+        self.outcomes[name]['success' if success else 'failure'] += 1
+
+    # --- Reporting ---
+
+    def elapsed(self):
+        return time.perf_counter() - self._t0
+
+    def summary(self):
+        elapsed = self.elapsed()
+        pages = len(self.durations.get('navigate', [])) + len(self.durations.get('category_load', []))
+        stages = {}
+        for name, values in self.durations.items():
+            stages[name] = {
+                'count': len(values),
+                'total_s': round(sum(values), 4),
+                'p50_s': round(percentile(values, 0.5), 4),
+                'p95_s': round(percentile(values, 0.95), 4),
+                'max_s': round(max(values), 4),
+            }
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'duration_s': round(elapsed, 3),
+            'pages': pages,
+            'pages_per_minute': round(pages / (elapsed / 60), 2) if elapsed > 0 else 0.0,
+            'stages': stages,
+            'outcomes': {name: dict(counts) for name, counts in self.outcomes.items()},
+        }
+
+    def to_prometheus(self, summary=None):
+        """Renders the summary in the Prometheus text exposition format."""
+        s = summary or self.summary()
+        run = s['run']
+        lines = [
+            '# HELP ksp_stage_duration_seconds Duration of scraper stages.',
+            '# TYPE ksp_stage_duration_seconds summary',
+        ]
+        for name, values in sorted(self.durations.items()):
+            labels = f'run="{run}",stage="{name}"'
+            for q in QUANTILES:
+                lines.append(f'ksp_stage_duration_seconds{{{labels},quantile="{q}"}} {percentile(values, q):.6f}')
+            lines.append(f'ksp_stage_duration_seconds_sum{{{labels}}} {sum(values):.6f}')
+            lines.append(f'ksp_stage_duration_seconds_count{{{labels}}} {len(values)}')
+
+        lines += ['# HELP ksp_stage_duration_max_seconds Slowest observation of each stage.',
+                  '# TYPE ksp_stage_duration_max_seconds gauge']
+        for name, values in sorted(self.durations.items()):
+            lines.append(f'ksp_stage_duration_max_seconds{{run="{run}",stage="{name}"}} {max(values):.6f}')
+
+        lines += ['# HELP ksp_outcomes_total Success/failure counts per stage.',
+                  '# TYPE ksp_outcomes_total counter']
+        for name, counts in sorted(s['outcomes'].items()):
+            for outcome, value in sorted(counts.items()):
+                lines.append(f'ksp_outcomes_total{{run="{run}",stage="{name}",outcome="{outcome}"}} {value}')
+
+        lines += ['# HELP ksp_pages_per_minute Page loads per minute over the whole run.',
+                  '# TYPE ksp_pages_per_minute gauge',
+                  f'ksp_pages_per_minute{{run="{run}"}} {s["pages_per_minute"]}',
+                  '# HELP ksp_run_duration_seconds Wall-clock duration of the run.',
+                  '# TYPE ksp_run_duration_seconds gauge',
+                  f'ksp_run_duration_seconds{{run="{run}"}} {s["duration_s"]}',
+                  '# HELP ksp_run_timestamp_seconds Unix time at which the run finished.',
+                  '# TYPE ksp_run_timestamp_seconds gauge',
+                  f'ksp_run_timestamp_seconds{{run="{run}"}} {int(time.time())}']
+        return '\n'.join(lines) + '\n'
+
+    def write_reports(self, report_dir=REPORT_DIR):
+        """
+        Writes <run>_<timestamp>.json (one per run) and <run>.prom (overwritten each run,
+        suitable for node_exporter's textfile collector). Returns the JSON path.
+        """
+        os.makedirs(report_dir, exist_ok=True)
+        s = self.summary()
+        stamp = self.started_at.strftime("%Y%m%d_%H%M%S")
+        json_path = os.path.join(report_dir, f"{self.run_name}_{stamp}.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(s, f, indent=2)
+
+        # Write-then-rename so the collector never reads a half-written file
+        prom_path = os.path.join(report_dir, f"{self.run_name}.prom")
+        with open(prom_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(s))
+        os.replace(prom_path + '.tmp', prom_path)
+
+        print(f"[Metrics] Run report: {json_path} | {s['pages_per_minute']} pages/min")
+        return json_path
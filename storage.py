@@ -0,0 +1,125 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from config import DB_NAME
+from deal_detector import DealDetector, init_deal_tables
+from product_matcher import ProductMatcher, init_matcher_tables
+from product_search import init_search_index
+
+
+# --- Database Management ---
+
+def init_db():
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS products
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT,
+                  price REAL,
+                  url TEXT,
+                  date TEXT)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_products_url_date ON products (url, date)")
+    init_deal_tables(conn)
+    init_matcher_tables(conn)
+    init_search_index(conn)
+    conn.commit()
+    conn.close()
+
+
+def change_state(db_name=DB_NAME):
+    """Cheap fingerprint of the DB contents: changes whenever SQLite writes the file (or its WAL)."""
+    state = []
+    for path in (db_name, db_name + '-wal'):
+        try:
+            st = os.stat(path)
+            state.append(f"{st.st_mtime_ns}-{st.st_size}")
+        except FileNotFoundError:
+            state.append('-')
+    return ':'.join(state)
+
+
+# Rolling per-product state is read from the DB by primary key, so each save is O(1)
+deal_detector = DealDetector()
+product_matcher = ProductMatcher()
+
+
+def save_products(rows):
+    """
+    Saves many (name, price, url) or (name, price, url, date) records with one connection
+    and one commit. Returns the deal alerts they triggered.
+    """
+    current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    records = [(row[0], row[1], row[2], row[3] if len(row) > 3 else current_date) for row in rows]
+    conn = sqlite3.connect(DB_NAME)
+    alerts = []
+    # Another process (e.g. a harvest next to a scheduled crawl) may have written since the last batch
+    deal_detector.reset()
+    try:
+        conn.executemany("INSERT INTO products (name, price, url, date) VALUES (?, ?, ?, ?)", records)
+        for name, price, url, date in records:
+            product_matcher.assign(conn, url, name)
+            alert = deal_detector.observe(conn, url, name, price, date)
+            if alert:
+                alerts.append(alert)
+        conn.commit()
+    except Exception:
+        # The cached state includes the rolled-back observations and groups
+        deal_detector.reset()
+        product_matcher.reset()
+        raise
+    finally:
+        conn.close()
+    return alerts
+
+
+def save_product(name, price, url):
+    alerts = save_products([(name, price, url)])
+    print(f"[DB] Saved: {name[:30]}... | {price} NIS")
+    for alert in alerts:
+        print(f"[Deal] 🔥 {alert['drop_pct']:.1f}% below average (avg {alert['ew_mean']:.0f} NIS)")
+
+
+def import_legacy(path, default_url=None):
+    """
+    Copies the history of a pre-shared-DB scraper database (`prices` table) into
+    `products`. Rows already present (same URL and date) are skipped, so it is safe to
+    re-run. Returns the number of rows imported.
+    """
+    legacy = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    columns = [row[1] for row in legacy.execute("PRAGMA table_info(prices)")]
+    url_col = 'url' if 'url' in columns else 'NULL'
+    rows = legacy.execute(f"SELECT product_name, price, COALESCE({url_col}, ?), date FROM prices ORDER BY date",
+                          (default_url,)).fetchall()
+    legacy.close()
+
+    conn = sqlite3.connect(DB_NAME)
+    cur = conn.executemany('''INSERT INTO products (name, price, url, date)
+                              SELECT ?1, ?2, ?3, ?4
+                              WHERE NOT EXISTS (SELECT 1 FROM products WHERE url = ?3 AND date = ?4)''',
+                           [row for row in rows if row[2]])
+    conn.commit()
+    conn.close()
+    return cur.rowcount
+
+
+def view_results(limit=20):
+    """Prints the latest saved products. Returns False if there is nothing to report yet."""
+    try:
+        # Read-only, so reporting on a missing DB doesn't create an empty one
+        conn = sqlite3.connect(f"file:{DB_NAME}?mode=ro", uri=True)
+        rows = conn.execute("SELECT * FROM products ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        conn.close()
+    except sqlite3.OperationalError:
+        print(f"⚠️ No data found in `{DB_NAME}`. Please run `python ksp.py crawl` first.")
+        return False
+
+    print("\n" + "=" * 60)
+    print("FINAL REPORT")
+    print("=" * 60)
+    print(f"{'Price':<10} | {'Name'}")
+    print("-" * 60)
+    for row in rows:
+        print(f"{row[2]:<10} | {row[1][:60]}")
+    print("=" * 60 + "\n")
+    return True
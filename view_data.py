@@ -1,20 +1,28 @@
 import sqlite3
 
-# Connect to the database file
-conn = sqlite3.connect('prices.db')
-c = conn.cursor()
+from config import DB_NAME
 
-# Simple SQL command: "Fetch everything from the prices table"
-c.execute("SELECT * FROM prices")
-rows = c.fetchall()
 
-print(f"--- Total records saved: {len(rows)} ---")
-print("ID | Product Name | Price | Date")
-print("-" * 50)
+def show_all():
+    # Connect to the database file
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
 
-for row in rows:
-    # 'row' is a simple tuple, e.g.: (1, 'Keyboard', 101.0, '2023-12-01')
-    # Note: Changed '₪' to 'NIS' for standard English logging
-    print(f"{row[0]} | {row[1]} | {row[2]} NIS | {row[3]}")
+    # Simple SQL command: "Fetch everything from the products table"
+    c.execute("SELECT id, name, price, date FROM products")
+    rows = c.fetchall()
 
-conn.close()
\ No newline at end of file
+    print(f"--- Total records saved: {len(rows)} ---")
+    print("ID | Product Name | Price | Date")
+    print("-" * 50)
+
+    for row in rows:
+        # 'row' is a simple tuple, e.g.: (1, 'Keyboard', 101.0, '2023-12-01')
+        # Note: Changed '₪' to 'NIS' for standard English logging
+        print(f"{row[0]} | {row[1]} | {row[2]} NIS | {row[3]}")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    show_all()